@@ -6,16 +6,22 @@ It uses the logic from compare_score.py to compare an uploaded PMF
 against theoretical peptides.
 """
 
+import hashlib
+import importlib.metadata
+import io
+import os
+import pickle
+import tempfile
+import time
 import streamlit as st
 import pandas as pd
 from pathlib import Path
 import sys
 from typing import Tuple, List, Optional, Any
 
-# Import the comparison logic from compare_score.py
-# Ensure this script is in the same directory or PYTHONPATH includes src/casi/scripts
-
-import casi.scripts.compare_score as compare_score
+# casi.scripts.compare_score is imported lazily inside the helpers that use it,
+# so the first run in a server process that is served from the on-disk database
+# cache does not pay for importing it (pandas is still loaded here).
 
 def configure_page() -> None:
     """
@@ -74,10 +80,176 @@ def get_sidebar_config() -> Tuple[Path, Tuple[float, float], float]:
     )
     return db_path, mass_range, threshold
 
-@st.cache_data(show_spinner=False)
+# On-disk cache for the parsed theoretical database, so it survives server restarts
+DISK_CACHE_DIR = Path.home() / ".cache" / "zooms"
+# Number of mass ranges kept on disk for the current database of each folder
+DISK_CACHE_MAX_ENTRIES = 4
+# Age after which a leftover temporary file from an interrupted write is removed
+DISK_CACHE_TMP_MAX_AGE = 3600
+
+FolderSignature = Tuple[str, Tuple[Tuple[str, int, int], ...]]
+
+def _folder_signature(folder_path: Path) -> FolderSignature:
+    """
+    Builds a cheap, content-accurate signature of the CSV files in a folder
+    from their names, modification times and sizes.
+
+    Args:
+        folder_path: Path to the folder containing CSV files.
+
+    Returns:
+        A hashable tuple identifying the folder and the state of its CSV files.
+    """
+    files = []
+    for csv_path in sorted(folder_path.glob("*.csv")):
+        stat = csv_path.stat()
+        files.append((csv_path.name, stat.st_mtime_ns, stat.st_size))
+    return str(folder_path.resolve()), tuple(files)
+
+def _load(
+    folder_path: Path,
+    m_range: Tuple[float, float]
+) -> List[Any]:
+    """
+    Loads the theoretical peptide data without any caching.
+
+    Args:
+        folder_path: Path to the folder containing CSV files.
+        m_range: Tuple of (min_mass, max_mass).
+
+    Returns:
+        A list of theoretical peaks data structures.
+    """
+    import casi.scripts.compare_score as compare_score
+
+    return compare_score.load_theoretical_data(folder_path, m_range)
+
+def _casi_version() -> str:
+    """
+    Identifies the installed casi package without importing it, so that
+    disk cache entries built by a different version are not reused.
+
+    Returns:
+        The version (and install source, for VCS installs) of each distribution
+        providing casi, or an empty string if it cannot be determined.
+    """
+    try:
+        dists = importlib.metadata.packages_distributions().get("casi", [])
+        parts = []
+        for name in sorted(set(dists)):
+            dist = importlib.metadata.distribution(name)
+            # For git installs the version may not change between commits
+            parts.append(f"{name}=={dist.version} {dist.read_text('direct_url.json') or ''}")
+        return ";".join(parts)
+    except Exception:
+        return ""
+
+def _prune_disk_cache(folder_key: str, content_key: str) -> None:
+    """
+    Removes disk cache entries for this folder that were built from other
+    versions of its database, and all but the DISK_CACHE_MAX_ENTRIES most
+    recently used entries for the current one. Entries for other folders are
+    left alone. Also removes stale temporary files from interrupted writes.
+
+    Args:
+        folder_key: Hash of the folder path, as used in cache file names.
+        content_key: Hash of the folder contents and casi version.
+    """
+    now = time.time()
+    for tmp_path in DISK_CACHE_DIR.glob("*.tmp"):
+        if now - tmp_path.stat().st_mtime > DISK_CACHE_TMP_MAX_AGE:
+            tmp_path.unlink(missing_ok=True)
+
+    entries = sorted(
+        DISK_CACHE_DIR.glob(f"theor_{folder_key}_*.pkl"),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+    kept = 0
+    for path in entries:
+        if path.name.startswith(f"theor_{folder_key}_{content_key}_") and kept < DISK_CACHE_MAX_ENTRIES:
+            kept += 1
+            continue
+        path.unlink(missing_ok=True)
+
+def _load_disk_cached(
+    sig: FolderSignature,
+    m_range: Tuple[float, float]
+) -> List[Any]:
+    """
+    Loads the theoretical peptide data through a persistent pickle cache
+    in DISK_CACHE_DIR. Falls back to _load if the cache entry is missing,
+    unreadable, or cannot be written.
+
+    Args:
+        sig: Signature of the database folder from _folder_signature.
+        m_range: Tuple of (min_mass, max_mass).
+
+    Returns:
+        A list of theoretical peaks data structures.
+    """
+    folder_key = hashlib.blake2b(sig[0].encode(), digest_size=8).hexdigest()
+    content_key = hashlib.blake2b(
+        str((sig[1], _casi_version())).encode(), digest_size=16
+    ).hexdigest()
+    range_key = hashlib.blake2b(str(m_range).encode(), digest_size=8).hexdigest()
+    cache_path = DISK_CACHE_DIR / f"theor_{folder_key}_{content_key}_{range_key}.pkl"
+
+    if cache_path.exists():
+        try:
+            with open(cache_path, "rb") as f:
+                theor_peaks_list = pickle.load(f)
+            # Mark the entry as recently used so pruning keeps it
+            os.utime(cache_path)
+            return theor_peaks_list
+        except Exception:
+            # Corrupt or incompatible entry; rebuild it below
+            pass
+
+    theor_peaks_list = _load(Path(sig[0]), m_range)
+
+    try:
+        DISK_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial pickle
+        fd, tmp_name = tempfile.mkstemp(dir=DISK_CACHE_DIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(theor_peaks_list, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_name, cache_path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+        _prune_disk_cache(folder_key, content_key)
+    except Exception:
+        # Caching is best-effort (e.g. a read-only deployment or an
+        # unpicklable result) and must not fail a load that succeeded
+        pass
+
+    return theor_peaks_list
+
+# Bounded, as each entry holds a full copy of the database for one mass range
+@st.cache_data(show_spinner=False, max_entries=4)
+def _load_cached(
+    sig: FolderSignature,
+    m_range: Tuple[float, float]
+) -> List[Any]:
+    """
+    In-memory cache over _load_disk_cached, keyed on the folder signature so
+    that edits to the CSV files invalidate the cache and equivalent paths share it.
+
+    Args:
+        sig: Signature of the database folder from _folder_signature.
+        m_range: Tuple of (min_mass, max_mass).
+
+    Returns:
+        A list of theoretical peaks data structures.
+    """
+    return _load_disk_cached(sig, m_range)
+
 def load_theoretical_data(
     folder_path: Path, 
-    m_range: Tuple[float, float]
+    m_range: Tuple[float, float],
+    sig: Optional[FolderSignature] = None
 ) -> Optional[List[Any]]:
     """
     Loads and caches the theoretical peptide data to improve performance
@@ -86,13 +258,38 @@ def load_theoretical_data(
     Args:
         folder_path: Path to the folder containing CSV files.
         m_range: Tuple of (min_mass, max_mass).
+        sig: Precomputed signature of the folder from _folder_signature,
+            to avoid statting the CSV files again. Computed if omitted.
 
     Returns:
         A list of theoretical peaks data structures, or None if folder doesn't exist.
     """
     if not folder_path.exists():
         return None
-    return compare_score.load_theoretical_data(folder_path, m_range)
+    if sig is None:
+        sig = _folder_signature(folder_path)
+    return _load_cached(sig, m_range)
+
+# Bounded, as every distinct upload from any session adds an entry
+@st.cache_data(show_spinner=False, max_entries=16)
+def _parse_pmf(
+    file_bytes: bytes,
+    m_range: Tuple[float, float]
+) -> pd.DataFrame:
+    """
+    Parses the raw bytes of an uploaded PMF file. Cached on the file content
+    and mass range so reruns triggered by unrelated widgets skip the parse.
+
+    Args:
+        file_bytes: The raw contents of the uploaded file.
+        m_range: Tuple of (min_mass, max_mass).
+
+    Returns:
+        pd.DataFrame: Dataframe of experimental peaks.
+    """
+    import casi.scripts.compare_score as compare_score
+
+    return compare_score.read_exp_pmf(io.BytesIO(file_bytes), m_range)
 
 def read_experimental_pmf(
     uploaded_file: Any, 
@@ -110,11 +307,8 @@ def read_experimental_pmf(
             - pd.DataFrame: Dataframe of experimental peaks.
             - int: The number of peaks detected.
     """
-    # Reset file pointer to start
-    uploaded_file.seek(0)
-    
-    # compare_score.read_exp_pmf uses pd.read_table which accepts file-like objects
-    act_peaks_df = compare_score.read_exp_pmf(uploaded_file, mass_range)
+    # getvalue() returns the whole buffer regardless of the file pointer
+    act_peaks_df = _parse_pmf(uploaded_file.getvalue(), mass_range)
     total_peaks = len(act_peaks_df)
     return act_peaks_df, total_peaks
 
@@ -136,38 +330,87 @@ def run_species_comparison(
     Returns:
         pd.DataFrame: The results dataframe sorted by score.
     """
-    
+    import casi.scripts.compare_score as compare_score
+
     results_df, _ = compare_score.process_all_species(
         theor_peaks_list, 
         act_peaks_df, 
         threshold, 
         total_peaks,
     )
+
+    # Species names share one category pool; integer match counts are
+    # narrowed to int32, while float scores are left as they are so the
+    # downloaded values are not truncated
+    species = results_df["Species"]
+    if pd.api.types.is_string_dtype(species) or pd.api.types.is_object_dtype(species):
+        results_df["Species"] = species.astype("category")
+    if pd.api.types.is_integer_dtype(results_df["Match"]):
+        results_df["Match"] = results_df["Match"].astype("int32")
     return results_df
 
-def display_results(results_df: pd.DataFrame) -> None:
+def _analysis_key(
+    uploaded_file: Any,
+    db_sig: FolderSignature,
+    mass_range: Tuple[float, float],
+    threshold: float
+) -> Tuple[Any, ...]:
+    """
+    Builds a key identifying every input to the analysis, so results can be
+    reused across reruns triggered by unrelated widgets.
+
+    Args:
+        uploaded_file: The uploaded file object (Streamlit UploadedFile).
+        db_sig: Signature of the database folder from _folder_signature.
+        mass_range: Tuple of (min_mass, max_mass).
+        threshold: Matching threshold in Daltons.
+
+    Returns:
+        A hashable tuple of the analysis inputs.
+    """
+    # file_id is unique per upload, so the file contents need not be hashed
+    return uploaded_file.file_id, db_sig, mass_range, threshold
+
+@st.fragment
+def display_results(
+    results_df: pd.DataFrame,
+    top_20: pd.DataFrame,
+    max_match: Optional[float] = None
+) -> None:
     """
     Displays the analysis results in the Streamlit interface.
 
     Args:
         results_df: Dataframe containing the comparison results.
+        top_20: The top 20 rows of results_df, computed once per analysis.
+        max_match: Highest "Match" score in the results, used to scale the
+            progress bar. Precomputed so the column is not rescanned each rerun.
     """
     st.subheader("🏆 Top 20 Species Matches")
     
-    # Get Top 20
-    top_20 = results_df.head(20)
-    
     # Display as interactive table
+    # The progress bar needs max_value > min_value, so it is skipped when
+    # nothing matched; "plain" keeps match counts from being shown as "%"
+    column_config = {}
+    if max_match is not None and max_match > 0:
+        column_config["Match"] = st.column_config.ProgressColumn(
+            "Match",
+            format="plain",
+            min_value=0,
+            max_value=max_match,
+        )
     st.dataframe(
         top_20, 
-        use_container_width=True
+        width="stretch",
+        column_config=column_config
     )
     
     # Download Button
-    csv = results_df.to_csv(index=False).encode('utf-8')
+    # Passing a callable defers serialisation until the button is clicked,
+    # and the bytes are not kept once the download has been served
     st.download_button(
         label="Download Full Results CSV",
-        data=csv,
+        data=lambda: results_df.to_csv(index=False).encode('utf-8'),
         file_name="species_matches.csv",
         mime="text/csv",
     )
@@ -190,8 +433,9 @@ def main() -> None:
         return
 
     # Load DB
+    db_sig = _folder_signature(db_path)
     with st.spinner("Loading theoretical database..."):
-        theor_peaks_list = load_theoretical_data(db_path, mass_range)
+        theor_peaks_list = load_theoretical_data(db_path, mass_range, db_sig)
     
     if not theor_peaks_list:
         st.error("No CSV files found in the specified folder.")
@@ -202,21 +446,38 @@ def main() -> None:
         
         with st.spinner("Processing experimental PMF and comparing..."):
             try:
-                # 1. Read Experimental PMF
-                act_peaks_df, total_peaks = read_experimental_pmf(uploaded_file, mass_range)
+                # Only rerun the analysis when one of its inputs has changed
+                analysis_key = _analysis_key(uploaded_file, db_sig, mass_range, threshold)
+                if st.session_state.get("analysis_key") != analysis_key:
+                    # 1. Read Experimental PMF
+                    act_peaks_df, total_peaks = read_experimental_pmf(uploaded_file, mass_range)
 
-                st.info(f"**Detected Peaks in Range:** {total_peaks}")
-                
-                # 2. Run Comparison
-                results_df = run_species_comparison(
-                    theor_peaks_list, 
-                    act_peaks_df, 
-                    threshold, 
-                    total_peaks
-                )
+                    # 2. Run Comparison
+                    results_df = run_species_comparison(
+                        theor_peaks_list, 
+                        act_peaks_df, 
+                        threshold, 
+                        total_peaks
+                    )
+
+                    st.session_state["results_df"] = results_df
+                    st.session_state["top_20"] = results_df.head(20)
+                    st.session_state["total_peaks"] = total_peaks
+                    st.session_state["max_match"] = (
+                        float(results_df["Match"].max())
+                        if "Match" in results_df.columns and not results_df.empty
+                        else None
+                    )
+                    st.session_state["analysis_key"] = analysis_key
+
+                st.info(f"**Detected Peaks in Range:** {st.session_state['total_peaks']}")
                 
                 # 3. Display Results
-                display_results(results_df)
+                display_results(
+                    st.session_state["results_df"],
+                    st.session_state["top_20"],
+                    st.session_state["max_match"]
+                )
                 
             except Exception as e:
                 st.error(f"An error occurred during analysis: {e}")